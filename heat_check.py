@@ -1,88 +1,159 @@
 # Tools we need for the app
 import streamlit as st  # For creating the web app
 import pandas as pd  # For handling and analyzing data tables
+import numpy as np  # For crunching all the stats at once
 import plotly.express as px  # For building visual graphs
-import time  # For slowing down API requests to avoid errors
+import plotly.graph_objects as go  # For building bar charts trace-by-trace
+import time  # For spacing out API requests to avoid errors
+import requests  # For downloading player headshots and keeping NBA API connections open
+import requests_cache  # Keeps NBA API responses on disk so restarts and other sessions can reuse them
 from datetime import datetime  # Used to determine the current NBA season
 import unicodedata # # lets us break accented letters apart so we can drop the accents
 import re # gives us tools to find and replace text patterns for cleaning names
+import warnings  # lets us quiet expected numpy warnings
+import threading  # lets us build the player index in the background
+from concurrent.futures import ThreadPoolExecutor  # Lets us wait on several NBA API requests at once
 
 # NBA API Modules
 from nba_api.stats.static import players  # Get the list of NBA players to find player IDs
 from nba_api.stats.endpoints import playergamelog  # Used to pull game-by-game stats for a player
+from nba_api.stats.library.http import NBAStatsHTTP  # The HTTP client every NBA stats endpoint goes through
+
+
+# How long (in seconds) a fetched game log is reused before asking the NBA API again. Both the disk cache and
+# the in-memory cache below use it, so each Analyze fetch gets a game log at most an hour old (30 min on disk + 30 min in memory).
+GAMELOG_TTL = 1800
+
+# Keeps NBA API requests at least half a second apart (shared by every session and thread, so it survives reruns)
+@st.cache_resource
+def _api_throttle():
+    return {"lock": threading.Lock(), "last_call": 0.0}
+
+def _wait_for_api_slot(min_gap=0.5):
+    throttle = _api_throttle()
+    with throttle["lock"]:  # one request at a time claims the next slot
+        wait = min_gap - (time.monotonic() - throttle["last_call"])
+        if wait > 0:
+            time.sleep(wait)  # only pause if the last request was too recent
+        throttle["last_call"] = time.monotonic()
+
+# Only requests that really go out to stats.nba.com pass through here; disk-cache hits are answered before this, so they never wait
+class _ThrottledAdapter(requests.adapters.HTTPAdapter):
+    def send(self, request, **kwargs):
+        _wait_for_api_slot()
+        return super().send(request, **kwargs)
+
+# One keep-alive connection to stats.nba.com shared by every request, so we only pay the TLS handshake once.
+# Responses are also saved to nba_cache.sqlite, so a restart or another session doesn't re-download them.
+@st.cache_resource
+def _nba_session():
+    session = requests_cache.CachedSession('nba_cache', backend='sqlite', expire_after=GAMELOG_TTL, allowable_methods=['GET'])
+    session.mount('https://stats.nba.com/', _ThrottledAdapter())
+    return session
+
+# nba_api sends these headers with every request; its "no-cache" ones would make the disk cache skip every stored response
+NBAStatsHTTP.headers = {name: value for name, value in NBAStatsHTTP.headers.items() if name not in ('Cache-Control', 'Pragma')}
+NBAStatsHTTP.set_session(_nba_session())
 
 
 # Converting Player Name to NBA ID (used to pull their stats)
+_PUNCT_RE = re.compile(r"[^a-z0-9\s]")  # matches any character that is not a lowercase letter, digit, or space
+_WS_RE = re.compile(r"\s+")  # matches runs of spaces
+
 def normalize_name(name):
     # 1. Trim spaces
     name = name.strip()
     # 2. Remove accents
     decomposed = unicodedata.normalize('NFKD', name)
-    filtered_chars = [] # start with an empty list
-    for ch in decomposed:  # check each character
-        if not unicodedata.combining(ch):   # if it’s not an accent mark
-            filtered_chars.append(ch)    # keep the character
-    without_accents = "".join(filtered_chars)   # join back into a string
+    without_accents = "".join(ch for ch in decomposed if not unicodedata.combining(ch))  # keep every character that isn’t an accent mark
     # 3. Lowercase
     lowercase = without_accents.lower()
     # 4. Remove punctuation
-    cleaned = re.sub(r"[^a-z0-9\s]", "", lowercase) # matches any character that is not a lowercase letter, digit, or space and deletes them
+    cleaned = _PUNCT_RE.sub("", lowercase) # deletes anything that is not a lowercase letter, digit, or space
     # 5. Collapse spaces
-    result = re.sub(r"\s+", " ", cleaned).strip() #\s+ will match runs of spaces, "" replaces wtih one space, .strip() removes space
+    result = _WS_RE.sub(" ", cleaned).strip() # "" replaces runs of spaces wtih one space, .strip() removes space
 
     return result
 
-def find_player_id(name):
-  all_players = players.get_players()  # Get all NBA players
-  for player in all_players:
-    if normalize_name(player["full_name"]) == normalize_name(name):
-      return player['id'], player["full_name"]  # Return the matching player ID
-  else:
-    return None, None # If not found, return None
-
-# Pulling Recent Game Stats for a Player
-def get_recent_stats(player_id, num_games):  # grab the last `num_games` for a player
-    time.sleep(0.5)  # pause so we don’t hit the NBA API too fast
+@st.cache_resource(ttl=86400)  # The roster barely changes, so load it once a day and share the same list with everyone
+def _all_players():
+  return players.get_players()  # Get all NBA players
 
-    # decide which season string to use (e.g. “2024” for 2024‑25 if it’s before October)
-    current_season = (
-        str(datetime.now().year - 1)  # if we’re before Oct, we’re still in last year’s season
-        if datetime.now().month < 10
-        else str(datetime.now().year))  # otherwise use this year
+@st.cache_resource(ttl=86400)  # One shared dict for every session; cache_data would copy all ~5000 entries on each lookup
+def _player_index():
+  index = {}  # normalized name -> (player ID, official spelling)
+  for player in _all_players():
+    # setdefault keeps the first match, same as the old top-to-bottom scan
+    index.setdefault(normalize_name(player["full_name"]), (player['id'], player["full_name"]))
+  return index
 
-    # pull all regular‑season games for that season
-    reg_df = playergamelog.PlayerGameLog(
+def find_player_id(name):
+  return _player_index().get(normalize_name(name), (None, None))  # Return the matching player ID, or None if not found
+
+# Start building the player index as soon as the app loads, so it's ready by the time someone clicks Analyze.
+# st.cache_resource is just a "run once per server" flag here: Streamlit re-runs this script in a fresh namespace on
+# every rerun, so a plain global would be reset and start a new thread each time. The background thread calls a
+# Streamlit cache outside any script run, which logs "missing ScriptRunContext!" once at startup; that's expected and harmless.
+@st.cache_resource
+def _warm_player_index():
+  threading.Thread(target=_player_index, daemon=True).start()
+
+_warm_player_index()
+
+# The only game log columns the app uses
+GAME_COLUMNS = ['GAME_DATE', 'PTS', 'REB', 'AST', 'FG_PCT']
+
+# counting stats easily fit in int16 and FG% in float32, which halves the bytes cached and moved by every later step
+GAME_DTYPES = {'PTS': 'int16', 'REB': 'int16', 'AST': 'int16', 'FG_PCT': 'float32'}
+
+# decide which season string to use (e.g. “2024” for 2024‑25 if it’s before October)
+_today = datetime.now()
+CURRENT_SEASON = (
+    str(_today.year - 1)  # if we’re before Oct, we’re still in last year’s season
+    if _today.month < 10
+    else str(_today.year))  # otherwise use this year
+
+# playoffs start around mid-April of the year after the season begins
+PLAYOFFS_START = datetime(int(CURRENT_SEASON) + 1, 4, 15)
+
+# Pulling a Player's Game Log (cached so repeat lookups skip the NBA API)
+@st.cache_data(ttl=GAMELOG_TTL, show_spinner=False)
+def _fetch_gamelog(player_id, season, season_type):
+    gamelog = playergamelog.PlayerGameLog(
         player_id=player_id,
-        season=current_season,
-        season_type_all_star="Regular Season").get_data_frames()[0]  # get the regular season DataFrame
+        season=season,
+        season_type_all_star=season_type).get_data_frames()[0]
+    gamelog = gamelog[GAME_COLUMNS]  # drop the ~25 columns we never look at before anything else touches the table
+    return gamelog.astype(GAME_DTYPES)
 
-    # pull all playoff games for the same season
-    po_df = playergamelog.PlayerGameLog(
-        player_id=player_id,
-        season=current_season,
-        season_type_all_star="Playoffs").get_data_frames()[0]  # get the playoffs DataFrame
+# Pulling Recent Game Stats for a Player
+def get_recent_stats(player_id, num_games):  # grab the last `num_games` for a player
+    if _today < PLAYOFFS_START:
+        # no playoff games exist yet, so only the regular season is worth a request
+        all_games = _fetch_gamelog(player_id, CURRENT_SEASON, "Regular Season")
+    else:
+        # pull the regular‑season and playoff games for that season at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            reg_future = executor.submit(_fetch_gamelog, player_id, CURRENT_SEASON, "Regular Season")
+            po_future = executor.submit(_fetch_gamelog, player_id, CURRENT_SEASON, "Playoffs")
+            reg_df = reg_future.result()  # get the regular season DataFrame
+            po_df = po_future.result()  # get the playoffs DataFrame
 
-    # stack regular + playoff logs together
-    all_games = pd.concat([reg_df, po_df], ignore_index=True)
+        # stack regular + playoff logs together
+        all_games = pd.concat([reg_df, po_df], ignore_index=True)
 
     # turn the date column into real datetime objects
-    all_games['GAME_DATE'] = pd.to_datetime(all_games['GAME_DATE'])
-
-    # sort so the most recent games are at the top
-    all_games = all_games.sort_values('GAME_DATE', ascending=False)
+    all_games['GAME_DATE'] = pd.to_datetime(all_games['GAME_DATE'], format='%b %d, %Y')  # the NBA API always sends dates like “APR 11, 2025”
 
-    # pick only the columns we care about and grab the newest `num_games`
-    latest = all_games[['GAME_DATE', 'PTS', 'REB', 'AST', 'FG_PCT']].head(num_games)
+    # grab the newest `num_games` without sorting the whole season
+    latest = all_games.nlargest(num_games, 'GAME_DATE')
 
-    # flip them back into chronological order and reset the index
+    # put them in chronological order and reset the index
     stats_table = latest.sort_values('GAME_DATE').reset_index(drop=True)
 
-    # format the dates as “Apr 11, 2025” (no time)
+    # format the dates as “Apr 11, 2025” (no time); these are plain strings, so the chart shows every label
     stats_table['GAME_DATE'] = stats_table['GAME_DATE'].dt.strftime('%b %d, %Y')
 
-    # make dates plain strings so the chart shows every label
-    stats_table['GAME_DATE'] = stats_table['GAME_DATE'].astype(str)
-
     return stats_table  # send back the cleaned, sorted, and formatted table
 
 
@@ -91,41 +162,56 @@ def get_recent_stats(player_id, num_games):  # grab the last `num_games` for a p
 def get_player_image_url(player_id):
     return f"https://cdn.nba.com/headshots/nba/latest/1040x760/{player_id}.png"  # Direct URL to NBA headshots
 
+# Downloads the headshot once a day instead of on every rerun
+@st.cache_data(ttl=86400, show_spinner=False)
+def _headshot_bytes(player_id):
+    try:
+        response = requests.get(get_player_image_url(player_id), timeout=5)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None  # failures are cached too, so a missing or slow headshot doesn't block every rerun
+    return response.content
+
+# Gets the headshot to show for a player (falls back to the URL, which the browser loads on its own, if the download failed)
+def get_player_image(player_id):
+    return _headshot_bytes(player_id) or get_player_image_url(player_id)
+
 
 
 # Heating Up or Cooling Down Analysis
-def analyze_trend(player_stats, player_name, selected_stats, recent_check):  # Define function to analyze a player’s performance trend
-    if len(player_stats) < recent_check + 1:  # Ensures there is enough games worth of data to be compared for each player
-        st.warning(f"Not enough games to analyze trend for {player_name}.")  # Displays an error if there is not enough data to comeplete analysis
-        return  # If there is not enough data, then exits code block early
+TREND_LABELS = {1: "Heating Up 🔥", -1: "Cooling Down ❄️", 0: "Stable"}  # What each trend code means
 
-    # Split into recent vs. baseline games
-    recent_games = player_stats.tail(recent_check)  # Take the last `recent_check` rows as the recent games
-    baseline_games = player_stats.head(len(player_stats) - recent_check)  # The rest are baseline games
+# The number crunching behind the trend check, kept free of pandas and Streamlit.
+# Games run along the second-to-last axis and stats along the last, so the same kernel works on one
+# player's (games, stats) table or a stacked (players, games, stats) array. Returns +1 (heating up),
+# -1 (cooling down), 0 (stable), or NaN when the baseline std dev is NaN or zero and we can't compare.
+def _trend_kernel(stats_arr, recent_check):
+    recent_games = stats_arr[..., -recent_check:, :]  # Take the last `recent_check` rows as the recent games
+    baseline_games = stats_arr[..., :-recent_check, :]  # The rest are baseline games
 
-    # Calculate average for each group of games
-    recent_avg = recent_games[selected_stats].mean()  # Compute mean of each selected stat over recent games
-    baseline_avg = baseline_games[selected_stats].mean()  # Compute mean of each selected stat over baseline games
-    baseline_std = baseline_games[selected_stats].std()  # Compute standard deviation for baseline stats
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # A single baseline game has no std dev; that stat comes back NaN
+        recent_avg = np.nanmean(recent_games, axis=-2)  # Compute mean of each stat over recent games
+        baseline_avg = np.nanmean(baseline_games, axis=-2)  # Compute mean of each stat over baseline games
+        baseline_std = np.nanstd(baseline_games, axis=-2, ddof=1)  # Compute standard deviation for baseline stats (ddof=1 like pandas)
 
-    comments = []  # Initialize list to collect trend comments
+    diff = recent_avg - baseline_avg  # Difference between recent and baseline averages
 
-    # Loop through each selected stat
-    for stat in selected_stats:
-        baseline_val = baseline_avg[stat]  # Baseline average value for this stat
-        std_val = baseline_std[stat]       # Baseline standard deviation for this stat
+    # More than one std dev up is heating up, more than one down is cooling down, otherwise stable
+    codes = np.select([diff > baseline_std, diff < -baseline_std], [1.0, -1.0], default=0.0)
+    comparable = ~np.isnan(baseline_std) & (baseline_std != 0)  # NaN or zero std dev means we cannot compare
+    return np.where(comparable, codes, np.nan)
 
-        if pd.isna(std_val) or std_val == 0:  # Skip if std dev is NaN or zero (cannot compare)
-            continue  # Move to next stat
+def analyze_trend(player_stats, player_name, selected_stats, recent_check):  # Define function to analyze a player’s performance trend
+    if len(player_stats) < recent_check + 1:  # Ensures there is enough games worth of data to be compared for each player
+        st.warning(f"Not enough games to analyze trend for {player_name}.")  # Displays an error if there is not enough data to comeplete analysis
+        return  # If there is not enough data, then exits code block early
 
-        diff = recent_avg[stat] - baseline_val  # Difference between recent and baseline averages
+    stats_arr = player_stats[selected_stats].to_numpy(dtype=float)  # One row per game, one column per stat
+    codes = _trend_kernel(stats_arr, recent_check)  # One trend code per selected stat
 
-        if diff > std_val:  # If increase is greater than one std dev
-            comments.append(f"{stat}: Heating Up 🔥")  # Mark as trending up
-        elif diff < -std_val:  # If decrease is greater than one std dev
-            comments.append(f"{stat}: Cooling Down ❄️")  # Mark as trending down
-        else:
-            comments.append(f"{stat}: Stable")  # Otherwise, consider the stat stable
+    # Skip stats we couldn't compare and turn the rest into readable comments
+    comments = [f"{stat}: {TREND_LABELS[int(code)]}" for stat, code in zip(selected_stats, codes) if not np.isnan(code)]
 
     # Output results
     st.subheader(f"{player_name}'s Trend Analysis")  # Add a subheader in Streamlit
@@ -135,6 +221,27 @@ def analyze_trend(player_stats, player_name, selected_stats, recent_check):  # D
 
 
 
+# Building a Player's Charts
+def build_stat_chart(player_stats, selected_stats, player_name, num_games):
+    fig = go.Figure([go.Bar(name=stat, x=player_stats["GAME_DATE"], y=player_stats[stat]) for stat in selected_stats])  # One bar per stat
+    fig.update_layout(barmode="group", title=f"{player_name} - Last {num_games} Games", xaxis_title="Game Date", yaxis_title="Stat Value", legend_title_text="Stat")  # Customize labels
+    return fig
+
+# px.line is slow enough that reusing the figure beats rebuilding it; the bar chart above is cheaper to rebuild than to look up
+@st.cache_data(ttl=1800, max_entries=50, show_spinner=False)
+def build_fg_chart(player_stats, player_name, num_games):
+    fg_chart = px.line( #sets the graph to a line graph
+        player_stats, #This shows were plotting the stats for this player
+        x="GAME_DATE", #sets title of x-axis
+        y="FG_PCT", #sets title of y-axis
+        title=f"{player_name} - FG% Over Last {num_games} Games", #This sets the title of the graph
+        markers=True) #This allows the graph to show seperate points for each game
+    fg_chart.update_layout(xaxis_title="Game Date", yaxis_title="FG%", hovermode="x unified") #Customizes the layout of the chart
+    return fg_chart
+
+
+
+
 #Building Streamlit UI Inputs
 
 # Title and Description
@@ -160,117 +267,137 @@ recent_check = st.slider(
     max_value=num_games - 1,
     value=min(3, num_games - 1))
 
-# Stat selector buttons
-selected_stats = st.multiselect(
-    "Pick which stats to graph",
-    options=["PTS", "REB", "AST", "FG_PCT"],
-    default=["PTS", "REB", "AST", "FG_PCT"])
 
 
+# Showing the Results for the Analyzed Player(s)
+def render_comparison(result, selected_stats, num_games, recent_check):
+    player1_id, original_name1, player1_stats = result['player1']
+    player2_id, original_name2, player2_stats = result['player2']
 
-# Main action button
-if st.button('Analyze'):
+# Show player headshots side-by-side
+    img_col1, img_col2 = st.columns(2)  # Two side-by-side image columns
 
-  original_name1 = None
-  original_name2 = None
+    with img_col1:
+        st.image(get_player_image(player1_id), caption=original_name1, use_container_width=True)  # Display Player 1 photo
 
-  # playerX_id tells you if there’s a valid NBA player,
-  # original_nameX holds the official spelling to label tables and charts
+    if player2_id:
+        with img_col2:
+            st.image(get_player_image(player2_id), caption=original_name2, use_container_width=True)  # Display Player 2 photo
 
-  if player1:
-    player1_id, original_name1 = find_player_id(player1)  # Gets player 1's ID
 
-    if player2:
-      player2_id, original_name2 = find_player_id(player2)  # Gets player 2's ID
-    else:
-      player2_id = None  # Sets player 2 to None so we know only one player is being analyzed
 
-    if player1_id is None:  # Show error if Player 1 name wasn't found
-      st.error(f"❌ Player not found: {player1}")
-    elif player2 and player2_id is None:  # Show error if Player 2 name was entered but not found
-      st.error(f"❌ Player not found: {player2}")
-    else:  # if both players are valid then continue
-      with st.spinner("Pulling game stats..."):  # Show loading spinner while data loads
-        player1_stats = get_recent_stats(player1_id, num_games)  # Step 1: Get recent game stats for Player 1
-        player1_stats["Player"] = original_name1  # Step 2: Add a "Player" column to label the data
+# Show player stats in side by side
+    stats_col1, stats_col2 = st.columns(2)
 
-        if player2_id:
-          player2_stats = get_recent_stats(player2_id, num_games)  # Get stats for Player 2
-          player2_stats["Player"] = original_name2  # Label Player 2's stats
+    with stats_col1:
+        st.subheader(f"{original_name1}'s Stats")  # Table heading for Player 1
+        st.dataframe(player1_stats)  # Table for Player 1 stats
+    if player2_id:
+        with stats_col2:
+            st.subheader(f"{original_name2}'s Stats")  # Table heading for Player 2
+            st.dataframe(player2_stats)  # Table for Player 2 stats
 
 
 
-# Show player headshots side-by-side
-      img_col1, img_col2 = st.columns(2)  # Two side-by-side image columns
+# Trend Analysis
+    analyze_trend(player1_stats, original_name1, selected_stats, recent_check)  # Run trend logic for Player 1
+    if player2_id:
+        analyze_trend(player2_stats, original_name2, selected_stats, recent_check)  # Run trend logic for Player 2
 
-      with img_col1:
-          st.image(get_player_image_url(player1_id), caption=original_name1, use_container_width=True)  # Display Player 1 photo
 
-      if player2_id:
-          with img_col2:
-              st.image(get_player_image_url(player2_id), caption=original_name2, use_container_width=True)  # Display Player 2 photo
 
+# Plotting each player's stats
+    plot_col1, plot_col2 = st.columns(2)  # Create a side-by-side graph that has 2 columns
 
+    with plot_col1:
+        st.subheader(f"{original_name1}'s Stat Trends")  # Heading above Player 1 graph
+        fig1 = build_stat_chart(player1_stats, selected_stats, original_name1, num_games)  # Build bar chart for Player 1
+        st.plotly_chart(fig1)  # Show Player 1 chart
 
-# Show player stats in side by side
-      stats_col1, stats_col2 = st.columns(2)
+# Extra FG% Line Chart for Player 1
+    if "FG_PCT" in selected_stats and "FG_PCT" in player1_stats.columns:
+        st.subheader(f"{original_name1}'s Field Goal Percentage Trend")
+        fg_chart1 = build_fg_chart(player1_stats, original_name1, num_games)  # Build FG% line chart for Player 1
+        st.plotly_chart(fg_chart1) #This tells streamlit to display the plotly chart
 
-      with stats_col1:
-          st.subheader(f"{original_name1}'s Stats")  # Table heading for Player 1
-          st.dataframe(player1_stats)  # Table for Player 1 stats
-      if player2_id:
-          with stats_col2:
-              st.subheader(f"{original_name2}'s Stats")  # Table heading for Player 2
-              st.dataframe(player2_stats)  # Table for Player 2 stats
 
+    if player2_id: #Checks if a second player has been entered
+        with plot_col2:
+            st.subheader(f"{original_name2}'s Stat Trends")  # Heading above Player 2 graph
+            fig2 = build_stat_chart(player2_stats, selected_stats, original_name2, num_games)  # Build bar chart for Player 2
+            st.plotly_chart(fig2)  # Show Player 2 chart
 
+# Extra FG% Line Chart for Player 2
+        if "FG_PCT" in selected_stats and "FG_PCT" in player2_stats.columns: #Continue with the code if player 2 is entered
+            st.subheader(f"{original_name2}'s Field Goal Percentage Trend") #Sets a subheading
+            fg_chart2 = build_fg_chart(player2_stats, original_name2, num_games)  # Build FG% line chart for Player 2
+            st.plotly_chart(fg_chart2) #This tells streamlit to display the plotly chart
 
-# Trend Analysis
-      analyze_trend(player1_stats, original_name1, selected_stats, recent_check)  # Run trend logic for Player 1
-      if player2_id:
-          analyze_trend(player2_stats, original_name2, selected_stats, recent_check)  # Run trend logic for Player 2
 
 
+# Main action button (a fragment, so clicking Analyze or changing the graphed stats only reruns this section instead of the whole page)
+@st.fragment
+def _analyze_fragment(player1, player2, num_games, recent_check):
+    # Stat selector buttons (inside the fragment, so toggling a stat redraws the results without fetching anything)
+    selected_stats = st.multiselect(
+        "Pick which stats to graph",
+        options=["PTS", "REB", "AST", "FG_PCT"],
+        default=["PTS", "REB", "AST", "FG_PCT"])
 
-# Plotting each player's stats
-      plot_col1, plot_col2 = st.columns(2)  # Create a side-by-side graph that has 2 columns
+    inputs = (player1, player2, num_games)  # everything the fetched results depend on
 
-      with plot_col1:
-          st.subheader(f"{original_name1}'s Stat Trends")  # Heading above Player 1 graph
-          plot_df1 = player1_stats.melt(id_vars="GAME_DATE", value_vars=selected_stats, var_name="Stat", value_name="Value")  # Reformat Player 1 stats
-          fig1 = px.bar(plot_df1, x="GAME_DATE", y="Value", color="Stat", barmode="group")  # Build bar chart for Player 1
-          fig1.update_layout(title=f"{original_name1} - Last {num_games} Games", xaxis_title="Game Date", yaxis_title="Stat Value")  # Customize labels
-          st.plotly_chart(fig1)  # Show Player 1 chart
+    # Clicking Analyze always goes through the fetch (a cheap cache hit if nothing expired), so it doubles as a refresh button
+    if st.button('Analyze'):
 
-# Extra FG% Line Chart for Player 1
-      if "FG_PCT" in selected_stats and "FG_PCT" in player1_stats.columns:
-          st.subheader(f"{original_name1}'s Field Goal Percentage Trend")
-          fg_chart1 = px.line( #sets the graph to a line graph
-              player1_stats, #This shows were plotting the stats for player 1
-              x="GAME_DATE", #sets title of x-axis
-              y="FG_PCT", #sets title of y-axis
-              title=f"{original_name1} - FG% Over Last {num_games} Games", #This sets the title of the graph
-              markers=True) #This allows the graph to show seperate points for each game
-          fg_chart1.update_layout(xaxis_title="Game Date", yaxis_title="FG%", hovermode="x unified") #Customizes the layout of the chart
-          st.plotly_chart(fg_chart1) #This tells streamlit to display the plotly chart
-
-
-      if player2_id: #Checks if a second player has been entered
-          with plot_col2:
-              st.subheader(f"{original_name2}'s Stat Trends")  # Heading above Player 2 graph
-              plot_df2 = player2_stats.melt(id_vars="GAME_DATE", value_vars=selected_stats, var_name="Stat", value_name="Value")  # Reformat Player 2 stats
-              fig2 = px.bar(plot_df2, x="GAME_DATE", y="Value", color="Stat", barmode="group")  # Build bar chart for Player 2
-              fig2.update_layout(title=f"{original_name2} - Last {num_games} Games", xaxis_title="Game Date", yaxis_title="Stat Value")  # Customize labels
-              st.plotly_chart(fig2)  # Show Player 2 chart
+      original_name1 = None
+      original_name2 = None
 
-# Extra FG% Line Chart for Player 2
-          if "FG_PCT" in selected_stats and "FG_PCT" in player2_stats.columns: #Continue with the code if player 2 is entered
-              st.subheader(f"{original_name2}'s Field Goal Percentage Trend") #Sets a subheading
-              fg_chart2 = px.line( #Sets the graph to a line graph
-                  player2_stats, #This shows that were plotting the stats for player 2
-                  x="GAME_DATE", #Sets x-axis title
-                  y="FG_PCT",  #Sets y-axis title
-                  title=f"{original_name2} - FG% Over Last {num_games} Games", #Sets title of the of the graph
-                  markers=True) #This allows the graph to show seperate points for each game
-              fg_chart2.update_layout(xaxis_title="Game Date", yaxis_title="FG%", hovermode="x unified") #Customizes the layout of the chart
-              st.plotly_chart(fg_chart2) #This tells streamlit to display the plotly chart
+      # playerX_id tells you if there’s a valid NBA player,
+      # original_nameX holds the official spelling to label tables and charts
+
+      if player1:
+        player1_id, original_name1 = find_player_id(player1)  # Gets player 1's ID
+
+        if player2:
+          player2_id, original_name2 = find_player_id(player2)  # Gets player 2's ID
+        else:
+          player2_id = None  # Sets player 2 to None so we know only one player is being analyzed
+
+        if player1_id is None:  # Show error if Player 1 name wasn't found
+          st.error(f"❌ Player not found: {player1}")
+        elif player2 and player2_id is None:  # Show error if Player 2 name was entered but not found
+          st.error(f"❌ Player not found: {player2}")
+        else:  # if both players are valid then continue
+          if player2_id == player1_id:  # Same player entered twice (or two spellings of the same name)
+            player2_id = None  # Only fetch, analyze, and chart them once
+            st.info("Same player entered twice; showing once.")
+
+          player2_stats = None  # Stays None when only one player is being analyzed
+
+          with st.spinner("Pulling game stats..."):  # Show loading spinner while data loads
+            with ThreadPoolExecutor(max_workers=2) as executor:  # Fetch both players at the same time
+              future1 = executor.submit(get_recent_stats, player1_id, num_games)  # Step 1: Get recent game stats for Player 1
+              future2 = executor.submit(get_recent_stats, player2_id, num_games) if player2_id else None  # Get stats for Player 2
+              player1_stats = future1.result()
+
+              if future2:
+                player2_stats = future2.result()
+
+            player1_stats["Player"] = original_name1  # Step 2: Add a "Player" column to label the data
+
+            if player2_id:
+              player2_stats["Player"] = original_name2  # Label Player 2's stats
+
+          # Remember the results so stat and trend tweaks can redraw them without fetching again
+          st.session_state['last_result'] = {
+              'key': inputs,  # the inputs these results belong to
+              'player1': (player1_id, original_name1, player1_stats),
+              'player2': (player2_id, original_name2, player2_stats)}
+
+    # Show the last results as long as they still match what's typed in and the number of games
+    result = st.session_state.get('last_result')
+    if result and result['key'] == inputs:
+        render_comparison(result, selected_stats, num_games, recent_check)
+
+
+_analyze_fragment(player1, player2, num_games, recent_check)